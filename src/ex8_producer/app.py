@@ -1,15 +1,20 @@
 import base64
-import csv
+import functools
+import json
 import logging
+import threading
 import time
-from io import BytesIO, StringIO
-from typing import Any, Dict, Iterator, List, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO, TextIOWrapper
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import boto3
+import pandas as pd
 from botocore.exceptions import ClientError
-from avro import schema
-from avro.io import DatumWriter, BinaryEncoder
+from fastavro import parse_schema
+from fastavro.write import Writer
 from kafka import KafkaProducer
+from kafka.producer.future import FutureRecordMetadata
 
 from ex8_producer.settings import *
 from ex8_producer.utils.functions import *
@@ -19,6 +24,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+_INT_FIELDS = tuple(field for field, field_type in SCHEMA.items() if field_type == "int")
+_FIELD_ORDER = tuple(SCHEMA)
+_INT_MIN, _INT_MAX = -(2**31), 2**31 - 1  # Avro int is 32-bit
+
+
+@functools.cache
+def _load_schema() -> Dict[str, Any]:
+    """Reads and parses the Avro schema once per process."""
+    with open(SCHEMA_PATH, "rb") as f:
+        return parse_schema(json.load(f))
+
+
+def _new_chunk_writer(buffer: BytesIO, parsed_schema: Dict[str, Any]) -> Writer:
+    """Resets the buffer and starts a new Avro container file in it."""
+    buffer.seek(0)
+    buffer.truncate(0)
+    return Writer(buffer, parsed_schema, codec=AVRO_CODEC)
+
 
 class Producer:
     """
@@ -36,6 +59,9 @@ class Producer:
         self.s3_client = self._get_aws_clients()
         self.kafka_producer = self._get_kafka_producer()
         self.parsed_schema = self._get_parsed_schema()
+        self.processed_files = set()
+        self.failed_files: Dict[str, Tuple[int, float]] = {}
+        self._local = threading.local()
 
 
     @staticmethod
@@ -61,7 +87,14 @@ class Producer:
         try:
             producer = KafkaProducer(
                 bootstrap_servers=self.kafka_bootstrap_servers,
-                value_serializer=lambda v: v
+                value_serializer=lambda v: v,
+                acks=KAFKA_ACKS,
+                linger_ms=KAFKA_LINGER_MS,
+                batch_size=KAFKA_BATCH_SIZE,
+                compression_type=KAFKA_COMPRESSION_TYPE,
+                buffer_memory=KAFKA_BUFFER_MEMORY,
+                max_in_flight_requests_per_connection=KAFKA_MAX_IN_FLIGHT_REQUESTS,
+                max_block_ms=KAFKA_MAX_BLOCK_MS
             )
             return producer
         except Exception as e:
@@ -73,9 +106,7 @@ class Producer:
     def _get_parsed_schema() -> Dict[str, Any]:
         """Builds and parses the Avro schema."""
         try:
-            with open(SCHEMA_PATH, "r") as f:
-                parsed_schema = schema.parse(f.read()) 
-            return parsed_schema
+            return _load_schema()
         except FileNotFoundError:
             logger.error(f"Schema file not found at: {SCHEMA_PATH}")
             raise
@@ -118,82 +149,208 @@ class Producer:
             response = self.s3_client.get_object(
                 Bucket=self.bucket_name, Key=object_key
             )
-            content = response["Body"].read().decode("iso-8859-1")
-            csv_file = StringIO(content)
-
-            reader = csv.DictReader(csv_file, delimiter=";")
+            # StreamingBody has no binary mode, so pandas would treat it as a
+            # text handle and ignore `encoding`; decode it explicitly.
+            frames = pd.read_csv(
+                TextIOWrapper(response["Body"], encoding="iso-8859-1"),
+                sep=";",
+                dtype=str,
+                keep_default_na=False,
+                na_values=[""],
+                usecols=lambda column: sinitize_text(column).lower() in SCHEMA_KEYS,
+                chunksize=CHUNK_SIZE,
+            )
 
-            for row in reader:
-                row_data = {}
-                for field, value in row.items():
-                    sanitized_field = sinitize_text(field).lower()
-                    if sanitized_field in SCHEMA:
-                        row_data[sanitized_field] = value if value else None
-                yield row_data
+            required_fields = [
+                field["name"]
+                for field in self.parsed_schema["fields"]
+                if not isinstance(field["type"], list)
+            ]
 
+            for frame in frames:
+                frame.columns = [sinitize_text(column).lower() for column in frame.columns]
+                frame = frame.loc[:, ~frame.columns.duplicated(keep="last")]
+                # Records are built in schema field order; fields missing from
+                # the header become empty columns.
+                frame = frame.reindex(columns=_FIELD_ORDER)
+
+                # Rows the Avro writer would reject are dropped and logged here,
+                # in bulk, so records can be written without per-record validation.
+                invalid_rows = pd.Series(False, index=frame.index)
+                for field in _INT_FIELDS:
+                    numbers = pd.to_numeric(frame[field], errors="coerce")
+                    invalid_rows |= frame[field].notna() & (
+                        (numbers % 1 != 0) | (numbers < _INT_MIN) | (numbers > _INT_MAX)
+                    )
+                    frame[field] = numbers
+                if invalid_rows.any():
+                    logger.warning(
+                        f"Skipping {int(invalid_rows.sum())} rows of {object_key} with non-integer or out-of-range values in int columns."
+                    )
+
+                missing = frame[required_fields].isna()
+                missing_rows = missing.any(axis=1) & ~invalid_rows
+                if missing_rows.any():
+                    empty_fields = ", ".join(missing.columns[missing[missing_rows].any()])
+                    logger.warning(
+                        f"Skipping {int(missing_rows.sum())} rows of {object_key} with empty required fields: {empty_fields}."
+                    )
+
+                frame = frame[~(invalid_rows | missing_rows)]
+                frame = frame.astype({field: "Int64" for field in _INT_FIELDS})
+
+                for values in frame.to_numpy(dtype=object, na_value=None).tolist():
+                    yield dict(zip(_FIELD_ORDER, values))
+
+        except pd.errors.EmptyDataError:
+            logger.warning(f"s3://{self.bucket_name}/{object_key} is empty, no rows to send.")
         except self.s3_client.exceptions.NoSuchKey:
             logger.error(f"File not found: s3://{self.bucket_name}/{object_key}")
+            raise
         except Exception as e:
             logger.error(
                 f"An unexpected error occurred while processing {object_key}: {e}"
             )
+            raise
 
 
-    def _send_chunk_to_kafka(self, chunk: List[Dict[str, Any]]):
-        """Sends a chunk of rows as a single message to Kafka."""
-        try:
-            writer = DatumWriter(self.parsed_schema)
-
-            for record in chunk:
-                buffer = BytesIO()
-                encoder = BinaryEncoder(buffer)
-                writer.write(record, encoder)
+    def _get_buffer(self) -> BytesIO:
+        """Returns the serialization buffer of the calling worker thread."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = BytesIO()
+        return buffer
 
-                avro_binary_data = buffer.getvalue()
-                self.kafka_producer.send(self.kafka_topic, avro_binary_data)
 
-            self.kafka_producer.flush()
-            logger.info(f"Sent {len(chunk)} messages to Kafka topic '{self.kafka_topic}'.")
+    def _send_chunk_to_kafka(
+        self, chunk_writer: Writer, buffer: BytesIO, record_count: int
+    ) -> Optional[FutureRecordMetadata]:
+        """Sends a chunk of rows as a single message to Kafka and returns its send future, or None on failure."""
+        try:
+            chunk_writer.flush()
+            avro_container_data = buffer.getvalue()
+            future = self.kafka_producer.send(self.kafka_topic, avro_container_data)
+            logger.info(
+                f"Queued {record_count} records ({len(avro_container_data)} bytes) as one message to Kafka topic '{self.kafka_topic}'."
+            )
+            return future
         except Exception as e:
             logger.error(f"Failed to send message to Kafka: {e}")
+            return None
 
 
-    def process_file(self, object_key: str):
+    def process_file(self, object_key: str) -> bool:
         """
         Processes a single CSV file and sends its data to Kafka in chunks.
+
+        Returns True only if the whole file was read and every chunk was sent
+        (and, unless acks is 0, delivered).
         """
-        chunk = []
-        for row_data in self._process_csv_rows(object_key):
-            chunk.append(row_data)
-            if len(chunk) >= CHUNK_SIZE:
-                self._send_chunk_to_kafka(chunk)
-                chunk = []
-                time.sleep(RETRY_DELAY)
-        if chunk:
-            self._send_chunk_to_kafka(chunk)
+        buffer = self._get_buffer()
+        chunk_writer = None
+        record_count = 0
+        futures = []
+        try:
+            for row_data in self._process_csv_rows(object_key):
+                if chunk_writer is None:
+                    chunk_writer = _new_chunk_writer(buffer, self.parsed_schema)
+                    record_count = 0
+                chunk_writer.write(row_data)
+                record_count += 1
+                # The buffer only grows when the writer emits a block,
+                # so chunks are cut at block granularity.
+                if buffer.tell() >= TARGET_CHUNK_BYTES:
+                    futures.append(self._send_chunk_to_kafka(chunk_writer, buffer, record_count))
+                    chunk_writer = None
+                    if futures[-1] is None:
+                        break
+            if chunk_writer is not None and record_count:
+                futures.append(self._send_chunk_to_kafka(chunk_writer, buffer, record_count))
+        except Exception as e:
+            logger.error(f"Aborted {object_key}, it will be retried later: {e}")
+            return False
+
+        # The whole file is retried after a failed send, so the rest of it is
+        # not read or sent.
+        if futures and futures[-1] is None:
+            logger.error(f"A chunk of {object_key} could not be sent, it will be retried later.")
+            return False
+
+        self.kafka_producer.flush()
+        logger.info(f"Flushed messages from {object_key} to Kafka topic '{self.kafka_topic}'.")
+
+        if KAFKA_ACKS != 0:
+            return self._check_delivery(object_key, futures)
+        return True
+
+
+    def _check_delivery(self, object_key: str, futures: List[FutureRecordMetadata]) -> bool:
+        """Waits on the send futures of a file, logs any failed deliveries and returns whether all succeeded."""
+        failed = 0
+        last_error = None
+        for future in futures:
+            try:
+                future.get(timeout=KAFKA_SEND_TIMEOUT)
+            except Exception as e:
+                failed += 1
+                last_error = e
+        if failed:
+            logger.error(
+                f"Failed to deliver {failed} of {len(futures)} messages from {object_key}: {last_error}"
+            )
+        return not failed
 
 
     def run(self):
         """Main loop to run the producer."""
+        interval = MIN_PROCESS_INTERVAL
         while True:
             logger.info(
                 f"Checking for CSV files in s3://{self.bucket_name}/{self.s3_path_prefix}"
             )
-            csv_files = self.list_csv_files()
+            now = time.monotonic()
+            csv_files = [
+                object_key
+                for object_key in self.list_csv_files()
+                if object_key not in self.processed_files
+                and self.failed_files.get(object_key, (0, now))[1] <= now
+            ]
             if not csv_files:
-                logger.warning(
-                    f"No CSV files found in s3://{self.bucket_name}/{self.s3_path_prefix}. Waiting..."
+                logger.info(
+                    f"No CSV files to process in s3://{self.bucket_name}/{self.s3_path_prefix}. Waiting for {interval} seconds..."
                 )
-                time.sleep(PROCESS_INTERVAL)
+                time.sleep(interval)
+                interval = min(interval * 2, PROCESS_INTERVAL)
                 continue
 
-            for object_key in csv_files:
-                self.process_file(object_key)
-
-            logger.info(
-                f"Finished processing all CSV files. Waiting for {PROCESS_INTERVAL} seconds before checking again."
-            )
-            time.sleep(PROCESS_INTERVAL)
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                futures = {
+                    executor.submit(self.process_file, object_key): object_key
+                    for object_key in csv_files
+                }
+                for future in as_completed(futures):
+                    object_key = futures[future]
+                    try:
+                        succeeded = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to process {object_key}: {e}")
+                        succeeded = False
+                    if succeeded:
+                        self.processed_files.add(object_key)
+                        self.failed_files.pop(object_key, None)
+                    else:
+                        self._schedule_retry(object_key)
+
+            logger.info(f"Finished processing {len(csv_files)} CSV files.")
+            interval = MIN_PROCESS_INTERVAL
+
+
+    def _schedule_retry(self, object_key: str):
+        """Backs off a failed file exponentially, up to PROCESS_INTERVAL, before it is retried."""
+        failures = self.failed_files.get(object_key, (0, 0.0))[0] + 1
+        delay = min(MIN_PROCESS_INTERVAL * 2 ** failures, PROCESS_INTERVAL)
+        self.failed_files[object_key] = (failures, time.monotonic() + delay)
+        logger.warning(f"{object_key} failed {failures} time(s), retrying in {delay} seconds.")
 
 
 def main():
@@ -1,9 +1,20 @@
 import os
 from dotenv import load_dotenv
 
-CHUNK_SIZE = 10
-PROCESS_INTERVAL = 60  # seconds
-RETRY_DELAY = 20  # seconds
+CHUNK_SIZE = 10000  # rows parsed per pandas frame
+TARGET_CHUNK_BYTES = 524288  # serialized bytes per Kafka message
+KAFKA_ACKS = 1
+KAFKA_LINGER_MS = 100
+KAFKA_BATCH_SIZE = 65536  # bytes
+KAFKA_COMPRESSION_TYPE = "lz4"
+KAFKA_BUFFER_MEMORY = 33554432  # bytes
+KAFKA_MAX_IN_FLIGHT_REQUESTS = 5
+KAFKA_MAX_BLOCK_MS = 30000  # send() blocks up to this long while buffer_memory is full, matching KAFKA_SEND_TIMEOUT
+KAFKA_SEND_TIMEOUT = 30  # seconds
+AVRO_CODEC = "null"  # block codec of the Avro container; KAFKA_COMPRESSION_TYPE already compresses it
+PROCESS_INTERVAL = 60  # seconds, upper bound of the polling backoff
+MIN_PROCESS_INTERVAL = 1  # seconds
+MAX_WORKERS = 8  # files processed concurrently
 DOTENV_PATH = "/home/bait/dev/ex8-producer/.env"
 
 load_dotenv(dotenv_path=DOTENV_PATH)
@@ -34,4 +45,6 @@ SCHEMA = {
     "quantidade_total_de_clientes_ccs_e_scr": "int",
     "quantidade_de_clientes_ccs": "int",
     "quantidade_de_clientes_scr": "int"
-}
\ No newline at end of file
+}
+
+SCHEMA_KEYS = frozenset(SCHEMA)
\ No newline at end of file
@@ -1,7 +1,14 @@
+import functools
 import unicodedata
 from typing import List, Dict
 import re
 
+_NON_WORD = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+_MULTI_UNDERSCORE = re.compile(r'_+')
+
+
+@functools.lru_cache(maxsize=1024)
 def sinitize_text(text: str) -> str:
     """
     Remove special characters from the text.
@@ -9,12 +16,12 @@ def sinitize_text(text: str) -> str:
     # Normalize unicode characters
     text = unicodedata.normalize('NFKD', text)
     # Remove special characters using regex
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\s+', '_', text)  # Replace spaces with underscores
-    text = re.sub(r'_+', '_', text)  # Replace multiple underscores with a single one
+    text = _NON_WORD.sub('', text)
+    text = _WHITESPACE.sub('_', text)  # Replace spaces with underscores
+    text = _MULTI_UNDERSCORE.sub('_', text)  # Replace multiple underscores with a single one
     text = text.strip("_").strip()  # Remove leading/trailing underscores and spaces
     
-    if re.match(r'^\d', text):
+    if text[:1].isdecimal():
         text = f"col_{text}"
 
     return text
\ No newline at end of file
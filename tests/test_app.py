@@ -0,0 +1,232 @@
+import logging
+import threading
+from io import BytesIO
+
+import boto3
+from botocore.response import StreamingBody
+from botocore.stub import Stubber
+from fastavro import reader
+from kafka.errors import KafkaError
+
+from ex8_producer import app
+from ex8_producer.app import Producer, _load_schema
+
+BUCKET_NAME = "test-bucket"
+KAFKA_TOPIC = "test-topic"
+OBJECT_KEY = "reclamacoes/2020.csv"
+
+HEADER = (
+    "Ano;Trimestre;Categoria;Tipo;CNPJ IF;Instituição financeira;Índice;"
+    "Quantidade de reclamações reguladas procedentes;"
+    "Quantidade de reclamações reguladas - outras;"
+    "Quantidade de reclamações não reguladas;"
+    "Quantidade total de reclamações;"
+    "Quantidade total de clientes - CCS e SCR;"
+    "Quantidade de clientes - CCS;Quantidade de clientes - SCR;Coluna extra"
+)
+
+
+class FakeFuture:
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    def get(self, timeout=None):
+        if self.error:
+            raise self.error
+
+
+class FakeKafkaProducer:
+    """Records sent messages; `error` makes every send future fail, `send_error` every send call."""
+
+    def __init__(self, error: Exception = None, send_error: Exception = None):
+        self.error = error
+        self.send_error = send_error
+        self.messages = []
+
+    def send(self, topic, value):
+        self.messages.append((topic, value))
+        if self.send_error:
+            raise self.send_error
+        return FakeFuture(self.error)
+
+    def flush(self):
+        pass
+
+
+def _make_s3_client():
+    return boto3.client(
+        "s3",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+
+
+def _make_producer(content: str, kafka_producer: FakeKafkaProducer = None) -> Producer:
+    """Builds a Producer whose S3 client serves `content` as an iso-8859-1 CSV."""
+    s3_client = _make_s3_client()
+    data = content.encode("iso-8859-1")
+    stubber = Stubber(s3_client)
+    stubber.add_response(
+        "get_object",
+        {"Body": StreamingBody(BytesIO(data), len(data))},
+        {"Bucket": BUCKET_NAME, "Key": OBJECT_KEY},
+    )
+    stubber.activate()
+
+    producer = Producer.__new__(Producer)
+    producer.bucket_name = BUCKET_NAME
+    producer.s3_client = s3_client
+    producer.kafka_topic = KAFKA_TOPIC
+    producer.kafka_producer = kafka_producer or FakeKafkaProducer()
+    producer.parsed_schema = _load_schema()
+    producer._local = threading.local()
+    return producer
+
+
+def _sent_records(kafka_producer: FakeKafkaProducer) -> list:
+    return [
+        record
+        for _, value in kafka_producer.messages
+        for record in reader(BytesIO(value))
+    ]
+
+
+def test_process_csv_rows_decodes_iso_8859_1_stream():
+    content = (
+        f"{HEADER}\n"
+        "2020;1º;Bancos;Banco;00000000;Banco São João;1,5;10;;2;12;1000;;;ignorada\n"
+    )
+    producer = _make_producer(content)
+
+    rows = list(producer._process_csv_rows(OBJECT_KEY))
+
+    assert rows == [
+        {
+            "ano": 2020,
+            "trimestre": "1º",
+            "categoria": "Bancos",
+            "tipo": "Banco",
+            "cnpj_if": "00000000",
+            "instituicao_financeira": "Banco São João",
+            "indice": "1,5",
+            "quantidade_de_reclamacoes_reguladas_procedentes": 10,
+            "quantidade_de_reclamacoes_reguladas_outras": None,
+            "quantidade_de_reclamacoes_nao_reguladas": 2,
+            "quantidade_total_de_reclamacoes": 12,
+            "quantidade_total_de_clientes_ccs_e_scr": 1000,
+            "quantidade_de_clientes_ccs": None,
+            "quantidade_de_clientes_scr": None,
+        }
+    ]
+
+
+def test_process_csv_rows_skips_rows_with_non_integer_values():
+    content = (
+        f"{HEADER}\n"
+        "2020;1º;Bancos;Banco;;Banco A;1,5;10;;;abc;1000;;;\n"
+        "2020;1º;Bancos;Banco;;Banco B;1,5;10;;;1.5;1000;;;\n"
+        "2020;1º;Bancos;Banco;;Banco C;1,5;10;;;12;1000;;;\n"
+    )
+    producer = _make_producer(content)
+
+    rows = list(producer._process_csv_rows(OBJECT_KEY))
+
+    assert [row["instituicao_financeira"] for row in rows] == ["Banco C"]
+    assert rows[0]["quantidade_total_de_reclamacoes"] == 12
+
+
+def test_process_csv_rows_treats_empty_objects_as_empty_files():
+    producer = _make_producer("")
+
+    assert list(producer._process_csv_rows(OBJECT_KEY)) == []
+
+    kafka_producer = FakeKafkaProducer()
+    producer = _make_producer("", kafka_producer)
+
+    assert producer.process_file(OBJECT_KEY)
+    assert kafka_producer.messages == []
+
+
+def test_process_file_skips_only_rows_with_empty_required_fields():
+    content = (
+        f"{HEADER}\n"
+        "2020;1º;Bancos;Banco;;Banco A;1,5;10;;;12;1000;;;\n"
+        "2020;;Bancos;Banco;;Banco B;1,5;10;;;12;1000;;;\n"
+        "2020;1º;Bancos;Banco;;Banco C;1,5;10;;;12;1000;;;\n"
+    )
+    kafka_producer = FakeKafkaProducer()
+    producer = _make_producer(content, kafka_producer)
+
+    assert producer.process_file(OBJECT_KEY)
+    assert len(kafka_producer.messages) == 1
+    assert [record["instituicao_financeira"] for record in _sent_records(kafka_producer)] == [
+        "Banco A",
+        "Banco C",
+    ]
+
+
+def test_process_file_sends_nothing_when_every_row_is_invalid():
+    content = f"{HEADER}\n2020;1º;Bancos;Banco;;Banco A;1,5;10;;;99999999999;1000;;;\n"
+    kafka_producer = FakeKafkaProducer()
+    producer = _make_producer(content, kafka_producer)
+
+    assert producer.process_file(OBJECT_KEY)
+    assert kafka_producer.messages == []
+
+
+def test_process_csv_rows_logs_missing_required_column_once(caplog):
+    header = HEADER.replace("Trimestre;", "")
+    row = "2020;Bancos;Banco;;Banco A;1,5;10;;;12;1000;;;\n"
+    producer = _make_producer(f"{header}\n{row * 3}")
+
+    with caplog.at_level(logging.WARNING):
+        rows = list(producer._process_csv_rows(OBJECT_KEY))
+
+    assert rows == []
+    warnings = [record.getMessage() for record in caplog.records if record.levelno == logging.WARNING]
+    assert warnings == [
+        f"Skipping 3 rows of {OBJECT_KEY} with empty required fields: trimestre."
+    ]
+
+
+def test_process_file_reports_failed_deliveries():
+    content = f"{HEADER}\n2020;1º;Bancos;Banco;;Banco A;1,5;10;;;12;1000;;;\n"
+    producer = _make_producer(content, FakeKafkaProducer(error=KafkaError("broker down")))
+
+    assert not producer.process_file(OBJECT_KEY)
+
+
+def test_process_file_stops_reading_after_a_failed_send(monkeypatch):
+    monkeypatch.setattr(app, "TARGET_CHUNK_BYTES", 1)
+    content = f"{HEADER}\n" + "2020;1º;Bancos;Banco;;Banco A;1,5;10;;;12;1000;;;\n" * 3
+    kafka_producer = FakeKafkaProducer(send_error=KafkaError("buffer full"))
+    producer = _make_producer(content, kafka_producer)
+
+    assert not producer.process_file(OBJECT_KEY)
+    assert len(kafka_producer.messages) == 1
+
+def test_process_file_reports_unreadable_files():
+    content = f"{HEADER}\n2020;1º;Bancos;Banco;;Banco A;1,5;10;;;12;1000;;;\n"
+    kafka_producer = FakeKafkaProducer()
+    producer = _make_producer(content, kafka_producer)
+    producer.s3_client = _make_s3_client()
+    stubber = Stubber(producer.s3_client)
+    stubber.add_client_error("get_object", service_error_code="NoSuchKey", http_status_code=404)
+    stubber.activate()
+
+    assert not producer.process_file(OBJECT_KEY)
+    assert kafka_producer.messages == []
+
+
+def test_schedule_retry_backs_off_exponentially(monkeypatch):
+    monkeypatch.setattr(app.time, "monotonic", lambda: 1000.0)
+    producer = Producer.__new__(Producer)
+    producer.failed_files = {}
+
+    producer._schedule_retry(OBJECT_KEY)
+    assert producer.failed_files[OBJECT_KEY] == (1, 1000.0 + 2 * app.MIN_PROCESS_INTERVAL)
+
+    for _ in range(10):
+        producer._schedule_retry(OBJECT_KEY)
+    assert producer.failed_files[OBJECT_KEY] == (11, 1000.0 + app.PROCESS_INTERVAL)